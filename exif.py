@@ -12,82 +12,85 @@ An Exif block consits of:
 - IFD counts (2)
 - IFDs. They are described in the Ifd class.
 '''
-from ifd import Ifd
-
-class ByteOrder:
-    '''Translate Tiff byte order in int to Python's endian string.
-    Returns None if neither 4949 or 4D4D.
-    '''
-
-    _instance = None
-    _byte_orders = {
-        b'\x4D\x4D': 'big',
-        b'\x49\x49': 'little'
-    }
-
-    def __new__(cls):
-        if cls._instance == None:
-            cls._instance = super().__new__(cls)
-
-        return cls._instance
-
-
-    def get_byte_order(self, two_bytes):
-        ''' Get the byte order string ('big' or 'little') from 2-bytes bytes.
-        Returns None the bytes is corrupted.
-        '''
-        try:
-            return self._byte_orders[two_bytes]
-        except:
-            return None
-
+import struct
+from ifd import Ifd, read_ifd_records
+
+# Tiff byte order (2 bytes) -> Python's endian string.
+_BYTE_ORDERS = {
+    b'\x4D\x4D': 'big',
+    b'\x49\x49': 'little'
+}
+
+# The rest of the Tiff header after the byte order, plus IFD counts:
+# 002A (2), Offset (4), IFD counts (2)
+_TIFF_HEADER_STRUCT = {
+    'big': struct.Struct('>HIH'),
+    'little': struct.Struct('<HIH')
+}
 
 class Exif:
     '''Represents Exif segment.'''
 
-    def __init__(self, app1_data):
+    def __init__(self, app1_data, skip_unknown=False):
         ''' Parse the APP1 data (entire APP1 segment minus APP1 marker and Length).
+        If skip_unknown is True, the values of the IFDs with unknown tags are not read (None).
         Raises exception when:
         1) The Exif ID is not b'Exif\x00\x00'.
         2) The Byte Order field is not 4949 (little) or 4D4D (big)
         3) The 002A field is not 002A.
+        4) The data is too short for the Tiff header and IFD counts (16 bytes).
+        The IFD fields are parsed lazily, so errors in them (e.g., a truncated IFD table) are raised
+        on the first access to ifd_fields (get_dict(), get_ifds(), str()), not here.
         '''
         # fields
         self.byte_order = None                           # 'big' or 'little'
         self.offset = 0                                  # Offset "FROM the top of app1_data" to the 0th IFD. 
         self.ifd_count = 0                               # A number of IFD fields
-        self.ifd_fields = []                             # Ifd objects
-        self.data = app1_data                            # Reference to the app1_data (starting from Exif ID)
+        self._ifd_fields = None                          # IFD fields. Parsed on first access (see ifd_fields).
+        self.data = app1_data                            # Reference to the app1_data (starting from Exif ID). bytes or memoryview.
+        self.skip_unknown = skip_unknown                 # Do not read the values of unknown tags
 
         # The 1st 6 bytes is the Exif Identifier. The information is not stored here.
-        # If not, raise Exception
-        exif_identifier = app1_data[:6]
-        if exif_identifier != b'Exif\x00\x00':
-            raise Exception(f'Not a valid Exif segment. Wrong Exif Identifier: {app1_data[:6]}')
-
-        # Tiff header 1st field: Byte order (2 bytes).
-        byte_order = ByteOrder()
-        self.byte_order = byte_order.get_byte_order(app1_data[6:8])
+        # If not, raise Exception. app1_data[:6] is already a view when app1_data is a memoryview.
+        if app1_data[:6] != b'Exif\x00\x00':
+            raise Exception(f'Not a valid Exif segment. Wrong Exif Identifier: {bytes(app1_data[:6])}')
+
+        # Tiff header 1st field: Byte order (2 bytes). None if neither 4949 or 4D4D.
+        self.byte_order = _BYTE_ORDERS.get(bytes(app1_data[6:8]))
         if self.byte_order == None:
-            raise Exception(f'Not a valid Exif segment. Wrong byte order: {app1_data[6:8]}')
+            raise Exception(f'Not a valid Exif segment. Wrong byte order: {bytes(app1_data[6:8])}')
+
+        # The rest of the Tiff header and the IFD counts (8 bytes) in one go.
+        if len(app1_data) < 16:
+            raise Exception(f'Not a valid Exif segment. Too short for the Tiff header: {len(app1_data)} bytes')
+        twoA, offset, self.ifd_count = _TIFF_HEADER_STRUCT[self.byte_order].unpack_from(app1_data, 8)
 
         # Tiff header 2nd field (2 bytes): 002A. The information is not stored here.
-        twoA = int.from_bytes(app1_data[8:10], self.byte_order)
         if twoA != 0x002A:
-            raise Exception(f'Not a valid Exif segment. Wrong 002A: {app1_data[8:10]}')
+            raise Exception(f'Not a valid Exif segment. Wrong 002A: {bytes(app1_data[8:10])}')
 
-        # Tiff header 3rd field (2 bytes): Offset
+        # Tiff header 3rd field (4 bytes): Offset
         # The original offset counts from the beginning of Byte Order.
         # For convenience, I count from the Exif identifier (the beginning of this app1_data), so add additional 6.
-        self.offset = int.from_bytes(app1_data[10:14], self.byte_order) + 6
+        self.offset = offset + 6
+
+        # The rest is IFD fields. They are not parsed until someone asks for them.
 
-        # A number of IFD counts
-        self.ifd_count = int.from_bytes(app1_data[14:16], self.byte_order)
 
-        # The rest is IFD fields
-        for idx in range(self.ifd_count):
-            ifd = Ifd(idx, self.byte_order, self.data)
-            self.ifd_fields.append(ifd.get_dict_brief())
+    @property
+    def ifd_fields(self):
+        ''' IFD fields (a list of Ifd.get_dict_brief()). Read only.
+        Parsed on the first access, so the Tiff header only users (get_dict_tiff) do not pay for them.
+        Raises exception (on that first access) when the IFD fields are broken. See read_ifd_records().
+        '''
+        if self._ifd_fields is None:
+            # All the 12-byte records are decoded at once.
+            records = read_ifd_records(self.data, self.byte_order, self.ifd_count)
+            self._ifd_fields = [
+                Ifd(idx, self.byte_order, self.data, record, self.skip_unknown).get_dict_brief()
+                for idx, record in enumerate(records)
+            ]
+        return self._ifd_fields
 
 
     def __str__(self):
@@ -2,27 +2,89 @@
 # 2022-02-17: Satoshi Toyosawa
 
 import fractions
+import json
+import os
+import struct
 
 # Accompanying JSON file that lists the data types (BYTES, ASCII, etc) and IFD tags.
-JSON_FILE = 'ifd.json'
+# Resolved next to this module, since it is loaded at import (from whatever the current directory is).
+JSON_FILE = os.path.join(os.path.dirname(__file__), 'ifd.json')
+
+
+def _load_ifd_info(filename=JSON_FILE):
+    ''' Read the (types, tags) dicts from the JSON file. '''
+    with open(filename) as fp:
+        json_ifd = json.load(fp)
+
+    # 'signed' is only written for int types. Fill it in so that it is always present.
+    for type_dict in json_ifd['types'].values():
+        type_dict.setdefault('signed', False)
+    return json_ifd['types'], json_ifd['tags']
+
+# Loaded once at import. Ifd looks the types and tags up here directly.
+_IFD_TYPES, _IFD_TAGS = _load_ifd_info()
+
+
+# RATIONAL/SRATIONAL (8 bytes): numerator (4), denominator (4). Keyed by (endian, signed).
+_RATIONAL_STRUCT = {
+    ('big', False): struct.Struct('>II'),
+    ('little', False): struct.Struct('<II'),
+    ('big', True): struct.Struct('>ii'),
+    ('little', True): struct.Struct('<ii')
+}
 
 
 # Conversion functions for a various types
 # They all have the same signature, intentionally
 
 def _bytes_to_bytes(b, endian='big', signed=False):      # endian, signed not necessary
-    return b
+    return bytes(b)                                      # b may be a memoryview
 
 def _bytes_to_int(b, endian='big', signed=False):
     return int.from_bytes(b, byteorder=endian, signed=signed)
 
 def _bytes_to_string(b, endian='big', signed=False):
-    return b.decode(encoding='utf-8')[:-1]               # Remove the \0 at the end
+    return str(b, encoding='utf-8')[:-1]                 # Remove the \0 at the end. Works on memoryview, too.
 
 def _bytes_to_fraction(b, endian='big', signed=False):
-    numerator = int.from_bytes(b[0:4], byteorder=endian)
-    denominator = int.from_bytes(b[4:8], byteorder=endian)
-    return fractions.Fraction(numerator, denominator)
+    # Each rational is a pair of 4-bytes ints: numerator, denominator.
+    # Returns a Fraction if there is only one (count = 1), otherwise a list of them.
+    # b is short when the value runs past the end of the segment. Decode the complete pairs only.
+    b = b[:len(b) - len(b) % 8]
+    values = [
+        fractions.Fraction(numerator, denominator)
+        for numerator, denominator in _RATIONAL_STRUCT[endian, signed].iter_unpack(b)
+    ]
+    return values[0] if len(values) == 1 else values
+
+
+# Python type (the 'type' property in ifd.json) -> conversion function above
+_CALLER = {
+    'bytes': _bytes_to_bytes,
+    'string': _bytes_to_string,
+    'int': _bytes_to_int,
+    'Fraction': _bytes_to_fraction,
+}
+
+
+# One IFD record (12 bytes): Tag (2), Type (2), Count (4), Offset (4; as int)
+# Ifd keeps the raw 4 bytes of Offset as a view, too. They are the value itself when it fits.
+_IFD_STRUCT = {
+    'big': struct.Struct('>HHII'),
+    'little': struct.Struct('<HHII')
+}
+
+
+def read_ifd_records(app1_data, endian, ifd_count):
+    ''' Decode all the IFD records of the 0th IFD in one go.
+    Returns an iterator of (tag, type, count, offset_int) tuples, one per IFD.
+    The records start from the 16th byte of app1_data (see Ifd.__init__).
+    Raises exception when app1_data is too short to hold all of them.
+    '''
+    end = 16 + 12*ifd_count
+    if len(app1_data) < end:
+        raise Exception(f'Not a valid Exif segment. IFD fields cut short: {ifd_count} IFDs need {end} bytes, got {len(app1_data)}')
+    return _IFD_STRUCT[endian].iter_unpack(app1_data[16:end])
 
 
 
@@ -36,16 +98,18 @@ class IfdInfo():
     _ifd_tags = None                                     # ditto
 
     def __new__(cls, filename=JSON_FILE):
+        ''' Create the IFD types/tags dicts (singleton).
+        Note: filename only changes what this object returns. Ifd always parses with the tables
+        loaded from JSON_FILE at import.
+        '''
         if cls._instance == None:                        # Create just once
             cls._instance = super().__new__(cls)
-
-            import json
-            with open(filename) as fp:
-                json_ifd = json.load(fp)
-                cls._ifd_types = json_ifd['types']       # dict
-                cls._ifd_tags = json_ifd['tags']         # dict
-                # print(cls._ifd_types)                  # Debug
-                # print(cls._ifd_tags)                   # Debug
+            if filename == JSON_FILE:                    # Already loaded at import
+                cls._ifd_types, cls._ifd_tags = _IFD_TYPES, _IFD_TAGS
+            else:
+                cls._ifd_types, cls._ifd_tags = _load_ifd_info(filename)
+            # print(cls._ifd_types)                      # Debug
+            # print(cls._ifd_tags)                       # Debug
 
         return cls._instance                             # Return this class instance
 
@@ -55,38 +119,41 @@ class IfdInfo():
         Note that IfdInfo._ifd_tags is indexed by four hex degit WITHOUT leading 0x.
         '''
         hex_nox = f'{tag_id:04X}'                        # Must be upper-case
-        if hex_nox not in self._ifd_tags:
-            return None
-        else:
-            return self._ifd_tags[hex_nox]
+        return self._ifd_tags.get(hex_nox)               # None if not found
 
 
     def get_ifd_type_by_id(self, type_id):
-        str_id = str(type_id)
-        if str_id not in self._ifd_types:
-            return None
-        else:
-            return self._ifd_types[str_id]
+        return self._ifd_types.get(str(type_id))         # None if not found
 
 
 class Ifd():
 
-    def __init__(self, index, endian, app1_data):
-        """ Initialize from Exif (APP1) block """
-
-        # Fields
-        self.index = -1                                  # i-th IFD block
-        self.endian = endian                             # 'big' or 'little' (from Exif header)
-        self.tag_int = 0                                 # Tag number. int.
-        self.tag_name = None                             # Tag name. str.
-        self.type_int = 0                                # Type number. int.
-        self.type_dict = None                            # Type description. {name, type, length, signed}
-        self.count = 0                                   # A number of values here.
-        self.offset_bytes = None                         # The pointer to the value. COUNTED from the Exif idenfiier here!! In Bytes format.
-        self.data = app1_data                            # APP1 data bytes (Starting from Exif\0\0)
-
-        # Instanciate IFD information table
-        ifd_info = IfdInfo()
+    # Fields. Fixed with __slots__ since an Ifd is created for every IFD field (no per-object __dict__).
+    __slots__ = (
+        'index',                                         # i-th IFD block
+        'endian',                                        # 'big' or 'little' (from Exif header)
+        'tag_int',                                       # Tag number. int.
+        'tag_name',                                      # Tag name. str.
+        'type_int',                                      # Type number. int.
+        'type_dict',                                     # Type description. {name, type, length, signed}
+        'count',                                         # A number of values here.
+        'offset_int',                                    # The pointer to the value. COUNTED from the Tiff header. int.
+        'offset_bytes',                                  # The same 4 bytes as memoryview. The value itself if it fits.
+        'data',                                          # APP1 data bytes or memoryview (Starting from Exif\0\0)
+        'value'                                          # The value (converted to the python type)
+    )
+
+    def __init__(self, index, endian, app1_data, record=None, skip_unknown=False):
+        """ Initialize from Exif (APP1) block.
+        record is the (tag, type, count, offset_int) tuple from read_ifd_records().
+        If given, the 12 bytes are not decoded again here.
+        If skip_unknown is True and the tag is not in ifd.json, the value is not read (None).
+        """
+
+        # Fields (see __slots__). Each is written once.
+        self.index = index
+        self.endian = endian
+        self.data = app1_data
 
         # The starting byte (in the app1_data) of the i-th field is calculated as below because
         # - Exif identifier: 6 bytes
@@ -94,20 +161,19 @@ class Ifd():
         # - IFD counts: 2 bytes
         # - One IFD field is 12 bytes
         pos = 12 * index + 16
-
-        # Tag (2 bytes; int and string)
-        self.tag_int = int.from_bytes(app1_data[pos:pos+2], byteorder=endian)
-        self.tag_name = ifd_info.get_ifd_tag_by_id(self.tag_int)
-
-        # Type (2 bytes; int and dict)
-        self.type_int = int.from_bytes(app1_data[pos+2:pos+4], byteorder=endian)
-        self.type_dict = ifd_info.get_ifd_type_by_id(self.type_int)
-
-        # Count (4 bytes; int)
-        self.count = int.from_bytes(app1_data[pos+4:pos+8], byteorder=endian)
-
-        # Offset (4 bytes; read as bytes)
-        self.offset_bytes = app1_data[pos+8:pos+12]      # Bytes
+        if record is None:
+            record = _IFD_STRUCT[endian].unpack_from(app1_data, pos)
+        self.tag_int, self.type_int, self.count, self.offset_int = record
+        self.offset_bytes = memoryview(app1_data)[pos+8:pos+12]     # A view. No copy.
+
+        # Tag and Type names (None if unknown). Same as IfdInfo.get_ifd_{tag,type}_by_id().
+        self.tag_name = _IFD_TAGS.get(f'{self.tag_int:04X}')    # Must be upper-case
+        self.type_dict = _IFD_TYPES.get(str(self.type_int))
+
+        # Unknown (vendor/private) tags: nobody would look at the value.
+        if skip_unknown and self.tag_name is None:
+            self.value = None
+            return
         self.value = self._read_value_from_offset()
 
 
@@ -119,7 +185,7 @@ class Ifd():
             'type_int': self.type_int,
             'type_dict': self.type_dict,
             'count': self.count,
-            'offset': self.offset_bytes,
+            'offset': bytes(self.offset_bytes),
             'value': self.value
         }
 
@@ -142,42 +208,21 @@ class Ifd():
         '''
         value_size = self.count * self.type_dict['length']
 
-        # Which way do you go?
+        # Which way do you go? Either way, b is a memoryview (no copy). The conversion functions accept it as is.
         if value_size <= 4: 
             b = self.offset_bytes[:value_size]           # Inside the offset
         else:
-            offset = int.from_bytes(self.offset_bytes, byteorder=self.endian) + 6    # add 6 for 'exif\0\0'
-            b = self.data[offset:offset+value_size]
-
-        # I need to know if it were signed.
-        try:
-            signed = self.type_dict['signed']
-        except:
-            signed = None                                # Dummy
+            offset = self.offset_int + 6                 # add 6 for 'exif\0\0'
+            b = memoryview(self.data)[offset:offset+value_size]
 
-        return Ifd._bytes_to_value(
+        # The conversion functions are intentionally given the same signature irrespectively.
+        return _CALLER[self.type_dict['type']](
                 b,                                       # Bytes to parse
-                self.type_dict['type'],                  # data type
                 self.endian,                             # 'big' or 'little'
-                signed                                   # True if signed. Only for int.
+                self.type_dict['signed']                 # True if signed. Only for int.
             )
 
 
-    def _bytes_to_value(b, dtype, endian, signed):
-        ''' A private function to convert the bytes into the specific data type.
-        The following functions are intentionally given the same signature irrespectively.
-        '''
-
-        caller = {
-            'bytes': _bytes_to_bytes,
-            'string': _bytes_to_string,
-            'int': _bytes_to_int,
-            'Fraction': _bytes_to_fraction,
-        }
-        return caller[dtype](b, endian, signed)
-
-
-
 if __name__ == '__main__':
     """ For testing. """
     from sys import argv
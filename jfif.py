@@ -22,22 +22,19 @@ class Jfif:
 
     def get_unit(index):
         '''Returns the unit for {X, Y}density in string (see UNITS above).'''
-        try:
+        if 0 <= index < len(Jfif.UNITS):
             return Jfif.UNITS[index]
-        except:
-            return f'Wrong unit ({index})'
+        return f'Wrong unit ({index})'
 
 
     def __init__(self, app0_data):
-        '''app0_data (bytes) = APP0 segment - (APP0 marker + APP0 length)'''
+        '''app0_data (bytes or memoryview) = APP0 segment - (APP0 marker + APP0 length)'''
 
         # The ints are all unsinged and big-endian (spec does not clearly say so, though)
-        endian = 'big'
 
         # 0-4th bytes (5 bytes): Jfif Identifier (string).
-        jfif_identifier = app0_data[:5]
-        if jfif_identifier != b'JFIF\x00':
-            raise Exception(f'Not a valid Jdid segment. Wrong Jfif Identifier: {app0_data[:5]}')
+        if app0_data[:5] != b'JFIF\x00':
+            raise Exception(f'Not a valid Jdid segment. Wrong Jfif Identifier: {bytes(app0_data[:5])}')
 
         # 5-6th bytes (2): Version. 5th major, 6th minor. Both int. Converted to "major.minor" string.
         self.version = str(app0_data[5]) + '.' + str(app0_data[6])
@@ -46,8 +43,8 @@ class Jfif:
         self.units = Jfif.get_unit(app0_data[7])
 
         # 8-11th (4): Xdensity and Ydensity, 2 bytes each.
-        self.Xdensity = int.from_bytes(app0_data[8:10], endian)
-        self.Ydensity = int.from_bytes(app0_data[10:12], endian)
+        self.Xdensity = (app0_data[8] << 8) | app0_data[9]
+        self.Ydensity = (app0_data[10] << 8) | app0_data[11]
 
         # 12-13th (4): Xthumbnail、Ythumbnail sizes. int. (0, 0) if there is no thumbnail.
         self.Xthumbnail = app0_data[12]
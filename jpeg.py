@@ -20,8 +20,25 @@ References:
 - https://exiftool.org/TagNames/JPEG.html
 '''
 
+import json
+import mmap
+import os
+
 # Accompanying HSON file that lists the marker int - names (meaning) mappings.
-JSON_FILE = 'jpeg.json'
+# Resolved next to this module, since it is loaded at import (from whatever the current directory is).
+JSON_FILE = os.path.join(os.path.dirname(__file__), 'jpeg.json')
+
+
+def _load_markers(filename=JSON_FILE):
+    '''Read the marker dicts from the JSON file.
+    Returns ({hex-string: name}, {int: name}). Both come from the same load.
+    '''
+    with open(filename) as fp:
+        markers = json.load(fp)['markers']
+    return markers, {int(hex_str, 16): name for hex_str, name in markers.items()}
+
+# Loaded once at import (from JSON_FILE). JpegSegment looks the names up by int marker directly.
+_MARKERS, _MARKERS_BY_INT = _load_markers()
 
 class JpegMarkers():
     '''A container for JPEG markers dict: {value(int): name(str)}'''
@@ -31,15 +48,16 @@ class JpegMarkers():
     def __new__(cls, filename=JSON_FILE):
         '''Create a JPEG marker dict (singleton).
         Note: Only the popular markers are supported (otherwise 'No name').
+        Note: filename only changes what this object returns. JpegSegment.marker_name always
+        comes from the table loaded from JSON_FILE at import.
         '''
         if cls._instance == None:                        # Create just once
             cls._instance = super().__new__(cls)
-
-            import json
-            with open(filename) as fp:
-                json_jpeg = json.load(fp)
-                cls._markers = json_jpeg['markers']
-                # print(cls._markers)                    # debug
+            if filename == JSON_FILE:                    # Already loaded at import
+                cls._markers = _MARKERS
+            else:
+                cls._markers, _ = _load_markers(filename)
+            # print(cls._markers)                        # debug
 
         return cls._instance
 
@@ -48,10 +66,7 @@ class JpegMarkers():
         '''Get the JPEG marker string name from hex-string value (e.g., FFD8).
         'marker' is a four-char hex string with no leading 0x and uppercased.
         '''
-        try:
-            return self._markers[marker]
-        except:
-            return f'No name ({marker})'
+        return self._markers.get(marker, f'No name ({marker})')
 
 
     def get_names_all(self):
@@ -71,15 +86,20 @@ class JpegSegment():
     def __init__(self,
             marker,            # marker (int).
             length,            # data length (original length - 2)
-            data               # Segment data (excluding marker & length) (bytes)
+            data               # Segment data (excluding marker & length) (memoryview)
         ):
-        marker_dict = JpegMarkers()
         self.marker_int = marker
-        self.marker_hex = f'{marker:04X}'                # Uppercase
-        self.marker_name = marker_dict.get_name(self.marker_hex)
+        self.marker_name = _MARKERS_BY_INT.get(marker)
+        if self.marker_name is None:
+            self.marker_name = f'No name ({self.marker_hex})'
         self.length = length
         self.data = data
 
+    @property
+    def marker_hex(self):
+        '''Four-char hex string of the marker (e.g., FFD8). Formatted on demand.'''
+        return f'{self.marker_int:04X}'                  # Uppercase
+
     def __len__(self):
         '''Return the byte size of the body.
         e.g., for APP1/Exif, data starts from Exif ID.
@@ -124,39 +144,53 @@ class JpegStruct():
 
     def __init__(self, filename):
         # fields
-        self.count = 0                                   # #segments
         self.filename = filename                         # filename
         self.segments = []                               # a list of segment objs.
+        self._mm = None                                  # mmap of the file (read only). Or bytes when not mappable.
+        self._by_marker = {}                             # {marker_int: first segment obj with this marker}
 
+        # Map the whole file into memory and walk it with a cursor,
+        # instead of issuing fp.read() for every marker, length, and body.
+        # Empty files and pipes cannot be mapped. Read them in one go instead.
         with open(filename, 'rb') as fp:
-            # If the first bytes are not SOI, raise exception.
-            soi = int.from_bytes(fp.read(2), byteorder='big', signed=False)
-            if soi != 0xFFD8:
-                raise Exception('Missing SOI. Not a JPEG file.')
-
-            # Loop around each segment
-            while True:
-                marker = int.from_bytes(fp.read(2), byteorder='big', signed=False)
-                if marker == 0xFFD9:                     # End of Image. End.
-                    break
-                if marker <= 0xFF00:                     # Not a marker segment
-                    break
-
-                # The length field includes itself.
-                length = int.from_bytes(fp.read(2), byteorder='big', signed=False) - 2
-                data = fp.read(length)
-
-                self.segments.append(
-                    JpegSegment(marker, length, data)
-                )
-                self.count += 1
+            try:
+                self._mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):
+                self._mm = fp.read()
+        mv = memoryview(self._mm)
+
+        # All the ints here are 2-bytes unsigned big-endian: (b[0] << 8) | b[1].
+        # If the first bytes are not SOI, raise exception.
+        if len(mv) < 2 or (mv[0] << 8) | mv[1] != 0xFFD8:
+            raise Exception('Missing SOI. Not a JPEG file.')
+
+        # Loop around each segment
+        pos = 2
+        while pos + 4 <= len(mv):
+            marker = (mv[pos] << 8) | mv[pos+1]
+            if marker == 0xFFD9:                         # End of Image. End.
+                break
+            if marker <= 0xFF00:                         # Not a marker segment
+                break
+
+            # The length field includes itself.
+            length = ((mv[pos+2] << 8) | mv[pos+3]) - 2
+            data = mv[pos+4:pos+4+length]                # A view. No copy.
+            pos += 4 + length
+
+            segment = JpegSegment(marker, length, data)
+            self.segments.append(segment)
+            self._by_marker.setdefault(marker, segment)  # The first one wins
+
+
+    @property
+    def count(self):
+        '''A number of segments.'''
+        return len(self.segments)
 
 
     def __str__(self):
-        text = []
-        for i in range(self.count):
-            text.append(str(self.segments[i]))
-        return '\n'.join(text)
+        return '\n'.join(map(str, self.segments))
 
 
     def get_segment(self, marker):
@@ -164,13 +198,7 @@ class JpegStruct():
         When there are mutiple segments with the same marker, it returns the first one.
         Returns None if not found.
         '''
-        # A list of markers for finding the index of the segment
-        marker_list = [self.segments[i].marker_int for i in range(self.count)]
-        try:
-            index = marker_list.index(marker)
-            return self.segments[index]
-        except:
-            return None
+        return self._by_marker.get(marker)
 
 
 